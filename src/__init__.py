@@ -1,3 +1,3 @@
-from .atmo_layers import classify_layer, describe_altitude
+from .atmo_layers import classify_layer, classify_layer_idx, describe_altitude, describe_altitudes
 
-__all__ = ["classify_layer", "describe_altitude"]
+__all__ = ["classify_layer", "classify_layer_idx", "describe_altitude", "describe_altitudes"]
@@ -0,0 +1,125 @@
+/*
+ * Optional C fast path for atmo_layers classification.
+ *
+ * Build in place (the Python module falls back to pure Python when absent):
+ *   cc -O3 -shared -fPIC $(python3-config --includes) src/_atmo_core.c \
+ *      -o src/_atmo_core$(python3-config --extension-suffix)
+ *
+ * BOUNDS must match the exclusive upper bounds of atmo_layers.LAYERS; the Python
+ * side compares them at import and ignores this module on mismatch.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#define N_LAYERS 5
+
+static const double BOUNDS[N_LAYERS] = {15.0, 50.0, 85.0, 600.0, 10000.0};
+
+/* Layer index, or -1 below 0 km / at or above the top bound / NaN.
+ * Branch-free so the batch loop below auto-vectorizes at -O3. */
+static inline int
+classify_one(double km)
+{
+    int idx = (km >= BOUNDS[0]) + (km >= BOUNDS[1]) + (km >= BOUNDS[2]) + (km >= BOUNDS[3]);
+    int valid = (km >= 0.0) & (km < BOUNDS[N_LAYERS - 1]);
+    return valid ? idx : -1;
+}
+
+static PyObject *
+classify_idx(PyObject *self, PyObject *arg)
+{
+    (void)self;
+    double km = PyFloat_AsDouble(arg);
+    if (km == -1.0 && PyErr_Occurred())
+        return NULL;
+    return PyLong_FromLong(classify_one(km));
+}
+
+/* True if a buffer holds native items of the given struct format code. */
+static int
+has_format(const Py_buffer *view, char code)
+{
+    const char *fmt = view->format;
+    if (fmt != NULL && (fmt[0] == '@' || fmt[0] == '=' || fmt[0] == '<'))
+        fmt++;
+    return fmt != NULL && fmt[0] == code && fmt[1] == '\0';
+}
+
+/* classify_many(alts_km, out): alts_km is a contiguous float64 buffer, out a
+ * writable contiguous int8 buffer of the same length. */
+static PyObject *
+classify_many(PyObject *self, PyObject *args)
+{
+    (void)self;
+    PyObject *in_obj, *out_obj;
+    Py_buffer in, out;
+    if (!PyArg_ParseTuple(args, "OO:classify_many", &in_obj, &out_obj))
+        return NULL;
+    if (PyObject_GetBuffer(in_obj, &in, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0)
+        return NULL;
+    if (PyObject_GetBuffer(out_obj, &out, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT | PyBUF_WRITABLE) < 0) {
+        PyBuffer_Release(&in);
+        return NULL;
+    }
+
+    PyObject *result = NULL;
+    Py_ssize_t n = in.len / (Py_ssize_t)sizeof(double);
+    if (!has_format(&in, 'd') || !has_format(&out, 'b') || out.len != n) {
+        PyErr_SetString(PyExc_ValueError, "classify_many expects float64 input and int8 output of equal length");
+        goto done;
+    }
+
+    const double *src = (const double *)in.buf;
+    signed char *dst = (signed char *)out.buf;
+
+    Py_BEGIN_ALLOW_THREADS
+    for (Py_ssize_t i = 0; i < n; i++)
+        dst[i] = (signed char)classify_one(src[i]);
+    Py_END_ALLOW_THREADS
+
+    result = Py_NewRef(Py_None);
+done:
+    PyBuffer_Release(&in);
+    PyBuffer_Release(&out);
+    return result;
+}
+
+static PyMethodDef core_methods[] = {
+    {"classify_idx", classify_idx, METH_O, "Layer index for one altitude in km, or -1 if out of range."},
+    {"classify_many", classify_many, METH_VARARGS, "Fill an int8 buffer with layer indexes for a float64 buffer."},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef core_module = {
+    PyModuleDef_HEAD_INIT, "_atmo_core", "C fast path for atmo_layers classification.", -1, core_methods,
+    NULL, NULL, NULL, NULL,
+};
+
+PyMODINIT_FUNC
+PyInit__atmo_core(void)
+{
+    PyObject *m = PyModule_Create(&core_module);
+    if (m == NULL)
+        return NULL;
+
+    PyObject *bounds = PyTuple_New(N_LAYERS);
+    if (bounds == NULL) {
+        Py_DECREF(m);
+        return NULL;
+    }
+    for (int i = 0; i < N_LAYERS; i++) {
+        PyObject *b = PyFloat_FromDouble(BOUNDS[i]);
+        if (b == NULL) {
+            Py_DECREF(bounds);
+            Py_DECREF(m);
+            return NULL;
+        }
+        PyTuple_SET_ITEM(bounds, i, b);
+    }
+    if (PyModule_AddObject(m, "BOUNDS", bounds) < 0) {
+        Py_DECREF(bounds);
+        Py_DECREF(m);
+        return NULL;
+    }
+    return m;
+}
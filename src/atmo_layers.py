@@ -2,30 +2,42 @@
 from __future__ import annotations
 
 import argparse
+import bisect
 import csv
+import functools
+import io
+import itertools
 import json
+import math
 import os
 import sys
 from dataclasses import dataclass
-from typing import cast
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: faster JSON output when installed
+    orjson = None  # type: ignore[assignment]
 
 KM_PER_MILE = 1.609344
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Layer:
     name: str
     min_km: float            # inclusive lower bound (km)
-    max_km: Optional[float]  # exclusive upper bound; None = open-ended
+    max_km: float            # exclusive upper bound; math.inf = open-ended (None accepted)
     extent_note: str
     temperature_profile: str
     composition: str
     phenomena: str
 
+    def __post_init__(self) -> None:
+        if self.max_km is None:
+            object.__setattr__(self, "max_km", math.inf)
+
     def contains(self, altitude_km: float) -> bool:
-        lower_ok = altitude_km >= self.min_km
-        upper_ok = True if self.max_km is None else altitude_km < self.max_km
-        return lower_ok and upper_ok
+        return self.min_km <= altitude_km < self.max_km
 
 # Canonical layer set (approximate; boundaries vary with latitude/season/solar activity)
 LAYERS: List[Layer] = [
@@ -76,40 +88,196 @@ LAYERS: List[Layer] = [
     ),
 ]
 
+# Column-wise (struct-of-arrays) view of LAYERS; internal lookups index these by layer position
+_NAMES: Tuple[str, ...] = tuple(layer.name for layer in LAYERS)
+_MINS: Tuple[float, ...] = tuple(layer.min_km for layer in LAYERS)
+_MAXS: Tuple[float, ...] = tuple(layer.max_km for layer in LAYERS)
+_EXTENTS: Tuple[str, ...] = tuple(layer.extent_note for layer in LAYERS)
+_TEMPERATURE_PROFILES: Tuple[str, ...] = tuple(layer.temperature_profile for layer in LAYERS)
+_COMPOSITIONS: Tuple[str, ...] = tuple(layer.composition for layer in LAYERS)
+_PHENOMENA: Tuple[str, ...] = tuple(layer.phenomena for layer in LAYERS)
+_LAYERS_BY_IDX: Tuple[Layer, ...] = tuple(LAYERS)
+
+# Exclusive upper bounds in LAYERS order, for bisecting instead of scanning every layer
+_UPPER_BOUNDS = _MAXS
+
 def miles_to_km(miles: float) -> float:
     return miles * KM_PER_MILE
 
+def _classify_idx_bisect(altitude_km: float) -> int:
+    # Negated range check so NaN also falls through to -1
+    if not (_MINS[0] <= altitude_km < _UPPER_BOUNDS[-1]):
+        return -1  # below ground or above our exosphere cap
+    return bisect.bisect_right(_UPPER_BOUNDS, altitude_km)
+
+def _classify_idx_chain(altitude_km: float) -> int:
+    # Straight-line compare chain over the five layers; source for the Numba batch kernel
+    if not (altitude_km >= _MINS[0] and altitude_km < _UPPER_BOUNDS[4]):
+        return -1
+    if altitude_km < _UPPER_BOUNDS[0]:
+        return 0
+    if altitude_km < _UPPER_BOUNDS[1]:
+        return 1
+    if altitude_km < _UPPER_BOUNDS[2]:
+        return 2
+    if altitude_km < _UPPER_BOUNDS[3]:
+        return 3
+    return 4
+
+def _load_core() -> Any:
+    """The optional _atmo_core C extension (see _atmo_core.c), or None if unbuilt or out of date."""
+    try:
+        from . import _atmo_core as core  # type: ignore[attr-defined]
+    except ImportError:
+        try:
+            import _atmo_core as core  # run as a script from src/
+        except ImportError:
+            return None
+    return core if tuple(core.BOUNDS) == _UPPER_BOUNDS else None
+
+_CORE = _load_core()
+
+# Layer index (-1 if out of range) for one altitude. Scalars stay on bisect without the C
+# extension: a Numba dispatcher call costs more than the lookup it would replace.
+_classify_idx: Callable[[float], int] = _CORE.classify_idx if _CORE is not None else _classify_idx_bisect
+
+def classify_layer_idx(altitude_km: float) -> int:
+    """Index into LAYERS of the layer containing altitude_km, or -1 if out of range."""
+    return _classify_idx(altitude_km)
+
 def classify_layer(altitude_km: float) -> Optional[Layer]:
-    if altitude_km < 0:
-        return None
-    for layer in LAYERS:
-        if layer.contains(altitude_km):
-            return layer
-    return None  # above our exosphere cap
+    idx = _classify_idx(altitude_km)
+    return None if idx < 0 else _LAYERS_BY_IDX[idx]
+
+# Immutable per-layer report fields, merged under a fresh "input" dict per call
+_LAYER_TEMPLATES: Tuple[Dict[str, Any], ...] = tuple(
+    {
+        "layer": name,
+        "extent": extent,
+        "temperature_profile": temperature_profile,
+        "composition": composition,
+        "phenomena": phenomena,
+        "references_note": "Ranges are approximate; boundaries are gradual and vary with latitude/season/solar activity.",
+    }
+    for name, extent, temperature_profile, composition, phenomena in zip(
+        _NAMES, _EXTENTS, _TEMPERATURE_PROFILES, _COMPOSITIONS, _PHENOMENA
+    )
+)
+_OOR_TEMPLATE: Dict[str, Any] = {
+    "layer": None,
+    "note": "Altitude is outside modeled ranges (below 0 km or above ~10,000 km).",
+}
+
+def _build_report(altitude: float, unit: str, altitude_km: float, idx: int) -> Dict[str, Any]:
+    tpl = _LAYER_TEMPLATES[idx] if idx >= 0 else _OOR_TEMPLATE
+    return {"input": {"altitude": altitude, "unit": unit, "altitude_km": round(altitude_km, 6)}, **tpl}
 
 def describe_altitude(altitude: float, unit: str = "km") -> Dict[str, Any]:
     if unit not in {"km", "mi"}:
         raise ValueError("unit must be 'km' or 'mi'")
-    altitude_km = float(altitude if unit == "km" else miles_to_km(altitude))
-    layer = classify_layer(altitude_km)
+    altitude_km = float(altitude if unit == "km" else altitude * KM_PER_MILE)  # miles_to_km, inlined
+    return _build_report(altitude, unit, altitude_km, _classify_idx(altitude_km))
 
-    result: Dict[str, Any] = {
-        "input": {"altitude": altitude, "unit": unit, "altitude_km": round(altitude_km, 6)}
-    }
-    if layer is None:
-        result["layer"] = None
-        result["note"] = "Altitude is outside modeled ranges (below 0 km or above ~10,000 km)."
-        return result
-
-    result.update({
-        "layer": layer.name,
-        "extent": layer.extent_note,
-        "temperature_profile": layer.temperature_profile,
-        "composition": layer.composition,
-        "phenomena": layer.phenomena,
-        "references_note": "Ranges are approximate; boundaries are gradual and vary with latitude/season/solar activity."
-    })
-    return result
+def _describe_cached(altitude: float, unit: str = "km") -> Mapping[str, Any]:
+    """
+    Memoized describe_altitude for paths that only serialize the report (the API).
+    Entries are shared, so they are returned as read-only views.
+    """
+    # -0.0 == 0.0 and 1 == 1.0 share a hash; the sign term and typed=True keep them apart
+    return _describe_signed_cached(altitude, math.copysign(1.0, altitude), unit)
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _describe_signed_cached(altitude: float, sign: float, unit: str) -> Mapping[str, Any]:
+    report = describe_altitude(altitude, unit=unit)
+    report["input"] = MappingProxyType(report["input"])
+    return MappingProxyType(report)
+
+@functools.cache
+def _numpy() -> Any:
+    """numpy module, or None if not installed; imported on first use to keep CLI startup fast."""
+    try:
+        import numpy
+    except ImportError:  # optional: only the vectorized batch path needs it
+        return None
+    return numpy
+
+@functools.cache
+def _upper_bounds_array() -> Any:
+    """_UPPER_BOUNDS as a float64 array, built once instead of per searchsorted call."""
+    return _numpy().asarray(_UPPER_BOUNDS, dtype=_numpy().float64)
+
+# Batches at least this long use the parallel Numba kernel, but only when the host
+# process has already imported numba: importing and JIT-compiling it costs ~0.8 s,
+# which the kernel only wins back on tens of millions of rows.
+_PARALLEL_MIN_ROWS = 1 << 16
+
+@functools.cache
+def _compile_classify_all() -> Optional[Callable[[Any, Any], None]]:
+    """Numba-compiled parallel batch classifier, or None if numba is not installed."""
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+    classify_one = njit(inline="always")(_classify_idx_chain)
+
+    # No fastmath: it assumes no NaNs, and NaN altitudes must classify as out of range.
+    # Indexes fit in int8 (-1..4), which cuts the output array's memory traffic 8x.
+    @njit("void(float64[::1], int8[::1])", parallel=True, cache=True)
+    def classify_all(alts_km, out_idx):
+        for i in prange(alts_km.shape[0]):
+            out_idx[i] = classify_one(alts_km[i])
+
+    return classify_all
+
+def _classify_km_array(alts_km: Any) -> Any:
+    """Layer index (-1 if out of range) for each altitude in a float64 array of km."""
+    np = _numpy()
+    if _CORE is not None:
+        alts_km = np.ascontiguousarray(alts_km, dtype=np.float64)
+        idx = np.empty(len(alts_km), dtype=np.int8)
+        _CORE.classify_many(alts_km, idx)
+        return idx
+
+    if len(alts_km) >= _PARALLEL_MIN_ROWS and "numba" in sys.modules:
+        classify_all = _compile_classify_all()
+        if classify_all is not None:
+            alts_km = np.ascontiguousarray(alts_km, dtype=np.float64)
+            idx = np.empty(len(alts_km), dtype=np.int8)
+            classify_all(alts_km, idx)
+            return idx
+
+    bounds = _upper_bounds_array()
+    idx = np.searchsorted(bounds, alts_km, side="right")
+    # Negated range check so NaN is also out of range
+    idx[~((alts_km >= _MINS[0]) & (alts_km < bounds[-1]))] = -1
+    return idx
+
+def describe_altitudes(altitudes: Iterable[float], units: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    Vectorized describe_altitude over parallel altitude/unit sequences.
+    Uses a single NumPy searchsorted pass when numpy is installed; otherwise loops.
+    """
+    np = _numpy()
+    alts = altitudes.tolist() if np is not None and isinstance(altitudes, np.ndarray) else list(altitudes)
+    unit_list = units.tolist() if np is not None and isinstance(units, np.ndarray) else list(units)
+    if len(alts) != len(unit_list):
+        raise ValueError("altitudes and units must have the same length")
+    if np is None or not alts:
+        return [describe_altitude(a, unit=u) for a, u in zip(alts, unit_list)]
+
+    unit_arr = np.asarray(unit_list, dtype=object)
+    is_mi = unit_arr == "mi"
+    if not (is_mi | (unit_arr == "km")).all():
+        raise ValueError("unit must be 'km' or 'mi'")
+
+    alts_km = np.array(alts, dtype=np.float64)
+    np.multiply(alts_km, KM_PER_MILE, out=alts_km, where=is_mi)  # convert miles in place
+    idx = _classify_km_array(alts_km)
+
+    return [
+        _build_report(a, u, km, i)
+        for a, u, km, i in zip(alts, unit_list, alts_km.tolist(), idx.tolist())
+    ]
 
 # ---------- Batch utilities ----------
 
@@ -123,57 +291,261 @@ def read_batch_csv(path: str) -> Iterable[Tuple[float, str]]:
       - columns 'altitude', 'unit' with unit in {'km','mi'}
     """
     with open(path, newline="", encoding="utf-8") as f:
-        r = csv.DictReader(f)
+        yield from _parse_batch_rows(f)
+
+def _parse_batch_rows(f: Iterable[str]) -> Iterator[Tuple[float, str]]:
+    r = csv.reader(f)
+
+    # Resolve column positions once instead of building a dict per row
+    names: list[str] = next(r, [])
+
+    if "altitude" not in names:
+        raise ValueError("CSV must contain a column named 'altitude'.")
 
-        # Make fieldnames non-optional for membership tests (mypy-friendly)
-        names: tuple[str, ...] = tuple(r.fieldnames or ())
+    alt_idx = names.index("altitude")
+    unit_idx = names.index("unit") if "unit" in names else -1
 
-        if "altitude" not in names:
-            raise ValueError("CSV must contain a column named 'altitude'.")
+    # Blank lines are skipped (and not counted), as csv.DictReader does
+    for i, row in enumerate((row for row in r if row), start=2):
+        raw_alt = row[alt_idx] if alt_idx < len(row) else ""
+        if raw_alt == "":
+            raise ValueError(f"Row {i}: empty altitude")
+        try:
+            alt = float(raw_alt)
+        except ValueError:
+            raise ValueError(f"Row {i}: altitude must be a number, got {raw_alt!r}")
 
-        has_unit = "unit" in names
+        unit_val = "km"
+        if 0 <= unit_idx < len(row):
+            unit_val = (row[unit_idx] or "km").strip().lower()
+        if unit_val not in {"km", "mi"}:
+            raise ValueError(f"Row {i}: unit must be 'km' or 'mi', got {unit_val!r}")
 
-        for i, row in enumerate(r, start=2):
-            raw_alt = row.get("altitude")
-            if raw_alt in (None, ""):
-                raise ValueError(f"Row {i}: empty altitude")
-            try:
-                alt = float(cast(str, raw_alt))
-            except ValueError:
-                raise ValueError(f"Row {i}: altitude must be a number, got {raw_alt!r}")
+        yield alt, unit_val
 
-            unit_val = (row.get("unit") or "km").strip().lower() if has_unit else "km"
-            if unit_val not in {"km", "mi"}:
-                raise ValueError(f"Row {i}: unit must be 'km' or 'mi', got {unit_val!r}")
+# Rows classified per describe_altitudes call when streaming a batch
+_BATCH_CHUNK_ROWS = 65536
 
-            yield alt, unit_val
+def read_batch_csv_bulk(path: str, chunk_rows: int = _BATCH_CHUNK_ROWS) -> Iterator[Tuple[Any, Any]]:
+    """
+    Columnar variant of read_batch_csv: yields (altitudes, units) NumPy arrays of up to
+    chunk_rows rows, parsed by pandas' C reader, ready for describe_altitudes.
+    Requires pandas. Unlike read_batch_csv, rows with extra fields are rejected and
+    whitespace-only lines are skipped.
+    """
+    try:
+        import numpy as np
+        import pandas as pd
+    except Exception as e:
+        raise RuntimeError("pandas is not installed. Run `pip install pandas`.") from e
+
+    names = pd.read_csv(path, nrows=0).columns
+    if "altitude" not in names:
+        raise ValueError("CSV must contain a column named 'altitude'.")
+    has_unit = "unit" in names
+
+    reader = pd.read_csv(
+        path,
+        usecols=["altitude", "unit"] if has_unit else ["altitude"],
+        dtype={"unit": "category"},
+        keep_default_na=False,
+        na_values={"altitude": [""]},
+        float_precision="round_trip",
+        chunksize=chunk_rows,
+    )
+    first_row = 2
+    for chunk in reader:
+        col = chunk["altitude"]
+        if col.dtype.kind in "iuf":
+            alts = col.to_numpy(dtype=np.float64)
+            missing = np.flatnonzero(np.isnan(alts))  # only empty fields are NA here
+        else:
+            # Tokens the C parser does not read as numbers (e.g. "nan") leave the chunk as
+            # strings; convert those with float(), like read_batch_csv
+            raw = col.astype(str).to_numpy(dtype=object) if col.dtype.kind == "b" else col.to_numpy(dtype=object)
+            missing = np.flatnonzero(pd.isna(raw))
+            if not missing.size:
+                try:
+                    alts = raw.astype(np.float64)
+                except ValueError:
+                    for i, raw_alt in enumerate(raw, start=first_row):
+                        try:
+                            float(raw_alt)
+                        except ValueError:
+                            raise ValueError(f"Row {i}: altitude must be a number, got {raw_alt!r}") from None
+                    raise
+        if missing.size:
+            raise ValueError(f"Row {missing[0] + first_row}: empty altitude")
+
+        if has_unit:
+            # Normalize per category; code -1 (field missing from a short row) maps to the "km" default
+            unit_col = chunk["unit"]
+            norm = [(c or "km").strip().lower() for c in unit_col.cat.categories] + ["km"]
+            units = np.asarray(norm, dtype=object)[unit_col.cat.codes.to_numpy()]
+            bad = np.flatnonzero((units != "km") & (units != "mi"))
+            if bad.size:
+                raise ValueError(f"Row {bad[0] + first_row}: unit must be 'km' or 'mi', got {units[bad[0]]!r}")
+        else:
+            units = np.full(len(alts), "km", dtype=object)
+
+        yield alts, units
+        first_row += len(alts)
+
+def read_batch_csv_bytes(data: bytes) -> Tuple[Any, Any]:
+    """
+    Parses an in-memory batch CSV (same columns as read_batch_csv) into (altitudes, units).
+    Uses pyarrow's columnar CSV reader when installed; otherwise, or when the file has
+    something pyarrow reads differently (ragged rows, duplicate headers, floats such as
+    "1_000"), parses row by row.
+    """
+    def parse_rows() -> Tuple[Any, Any]:
+        rows = list(_parse_batch_rows(io.StringIO(data.decode("utf-8"), newline="")))
+        return [a for a, _ in rows], [u for _, u in rows]
 
-def write_results(path: str, reports: List[Dict[str, Any]]) -> None:
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return parse_rows()
+
+    try:
+        table = pacsv.read_csv(
+            pa.BufferReader(data),
+            convert_options=pacsv.ConvertOptions(
+                column_types={"altitude": pa.float64(), "unit": pa.string()},
+                # Only an empty field is missing; "nan" etc. parse as floats, as with float()
+                null_values=[""],
+                strings_can_be_null=False,
+            ),
+        )
+    except pa.ArrowInvalid:
+        return parse_rows()
+    if len(set(table.column_names)) != len(table.column_names):
+        return parse_rows()
+    if "altitude" not in table.column_names:
+        raise ValueError("CSV must contain a column named 'altitude'.")
+
+    alt_col = table["altitude"]
+    if alt_col.null_count:
+        first = pc.index(pc.is_null(alt_col), True).as_py()
+        raise ValueError(f"Row {first + 2}: empty altitude")
+    alts = alt_col.to_numpy()
+
+    if "unit" not in table.column_names:
+        return alts, ["km"] * len(alts)
+    raw_units = table["unit"]
+    unit_col = pc.if_else(pc.equal(raw_units, ""), "km", pc.utf8_lower(pc.utf8_trim_whitespace(raw_units)))
+    bad = pc.invert(pc.is_in(unit_col, value_set=pa.array(["km", "mi"])))
+    if pc.any(bad).as_py():
+        first = pc.index(bad, True).as_py()
+        raise ValueError(f"Row {first + 2}: unit must be 'km' or 'mi', got {unit_col[first].as_py()!r}")
+    return alts, unit_col.to_numpy(zero_copy_only=False)
+
+def _iter_batch_chunks(path: str) -> Iterator[Tuple[Any, Any]]:
+    """Yields (altitudes, units) from a batch CSV in chunks of up to _BATCH_CHUNK_ROWS."""
+    rows = iter(read_batch_csv(path))
+    while chunk := list(itertools.islice(rows, _BATCH_CHUNK_ROWS)):
+        yield [a for a, _ in chunk], [u for _, u in chunk]
+
+def _iter_batch_reports(path: str, dedupe: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Yields describe_altitude reports for a batch CSV, classifying one chunk at a time.
+    With dedupe, rows repeating an exact (altitude, unit) already seen reuse that
+    row's report instead of being classified again.
+    """
+    # Keyed on the exact parsed value; the sign term keeps -0.0 apart from 0.0
+    seen: Dict[Tuple[float, float, str], Dict[str, Any]] = {}
+    for alts, units in _iter_batch_chunks(path):
+        if not dedupe:
+            yield from describe_altitudes(alts, units)
+            continue
+
+        alts = alts.tolist() if hasattr(alts, "tolist") else alts
+        units = units.tolist() if hasattr(units, "tolist") else units
+        keys = [(a, math.copysign(1.0, a), u) for a, u in zip(alts, units)]
+        new: Dict[Tuple[float, float, str], Tuple[float, str]] = {}
+        for k, a, u in zip(keys, alts, units):
+            if k not in seen:
+                new.setdefault(k, (a, u))
+        if new:
+            seen.update(zip(new, describe_altitudes([a for a, _ in new.values()], [u for _, u in new.values()])))
+        yield from (seen[k] for k in keys)
+
+def _nonfinite_to_none(obj: Any) -> Any:
+    """Copy of obj with NaN and infinite floats replaced by None, as orjson writes them."""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, Mapping):
+        return {k: _nonfinite_to_none(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_nonfinite_to_none(v) for v in obj]
+    return obj
+
+def _json_bytes(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serializes obj with orjson when installed, falling back to the stdlib json module.
+    Either way NaN and infinities are written as null, so the output is valid JSON.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(_nonfinite_to_none(obj), indent=2 if indent else None, allow_nan=False).encode("utf-8")
+
+_CSV_FIELDS = (
+    "input.altitude", "input.unit", "input.altitude_km",
+    "layer", "extent", "temperature_profile", "composition", "phenomena", "note"
+)
+
+def _csv_row(r: Mapping[str, Any]) -> Tuple[Any, ...]:
+    # Flattens one report in _CSV_FIELDS order; keep the two in sync
+    inp = r.get("input", {})
+    return (
+        inp.get("altitude", ""), inp.get("unit", ""), inp.get("altitude_km", ""),
+        r.get("layer", ""), r.get("extent", ""), r.get("temperature_profile", ""),
+        r.get("composition", ""), r.get("phenomena", ""), r.get("note", ""),
+    )
+
+def write_results(path: str, reports: Iterable[Dict[str, Any]]) -> None:
+    """
+    Writes reports one record at a time, so a generator is never materialized.
+    Output goes to a temporary file beside path that replaces it only once every
+    record is written, so an error part-way through leaves no truncated file.
+    """
     ext = os.path.splitext(path)[1].lower()
-    if ext in {".json", ".jsonl"}:
-        with open(path, "w", encoding="utf-8") as f:
-            if ext == ".jsonl":
-                for rec in reports:
-                    f.write(json.dumps(rec) + "\n")
-            else:
-                json.dump(reports, f, indent=2)
-    elif ext == ".csv":
-        fields = [
-            "input.altitude", "input.unit", "input.altitude_km",
-            "layer", "extent", "temperature_profile", "composition", "phenomena", "note"
-        ]
-        with open(path, "w", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            w.writerow(fields)
-            for r in reports:
-                def g(key: str):
-                    if key.startswith("input."):
-                        return r.get("input", {}).get(key.split(".", 1)[1], "")
-                    return r.get(key, "")
-                w.writerow([g(k) for k in fields])
-    else:
+    if ext not in {".csv", ".json", ".jsonl"}:
         raise ValueError("Output file must end with .csv, .json, or .jsonl")
 
+    head, tail = os.path.split(path)
+    tmp = os.path.join(head, f".{tail}.{os.getpid()}.tmp")
+    try:
+        if ext == ".csv":
+            with open(tmp, "x", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                w.writerow(_CSV_FIELDS)
+                w.writerows(map(_csv_row, reports))
+        else:
+            with open(tmp, "xb") as bf:
+                if ext == ".jsonl":
+                    for rec in reports:
+                        bf.write(_json_bytes(rec))
+                        bf.write(b"\n")
+                else:
+                    # Same layout as an indent=2 dump of the whole list, emitted element by element
+                    sep = b"\n  "
+                    bf.write(b"[")
+                    for rec in reports:
+                        bf.write(sep)
+                        bf.write(_json_bytes(rec, indent=True).replace(b"\n", b"\n  "))
+                        sep = b",\n  "
+                    bf.write(b"]" if sep == b"\n  " else b"\n]")
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
 
 def _print_human(report: Dict[str, Any]) -> None:
     inp = report["input"]
@@ -191,39 +563,53 @@ def _print_human(report: Dict[str, Any]) -> None:
     print(f"Note: {report['references_note']}")
 
 
+# (altitude_km, expected layer name) pairs verified by _self_checks
+_CHECK_CASES: Tuple[Tuple[float, str], ...] = (
+    (0.0, "Troposphere"),
+    (14.9999, "Troposphere"),
+    (15.0, "Stratosphere"),
+    (50.0, "Mesosphere"),
+    (84.9999, "Mesosphere"),
+    (85.0, "Thermosphere"),
+    (400.0, "Thermosphere"),
+    (600.0, "Exosphere"),
+    (9999.0, "Exosphere"),
+    (-1.0, "None"),
+    (20000.0, "None"),
+)
+
+@functools.cache
 def _self_checks() -> None:
+    """Runs at most once per interpreter; all the work is inside the assert, so python -O skips it."""
     def layer_at(km: float) -> str:
-        L = classify_layer(km)
-        return L.name if L else "None"
-
-    cases = {
-        0.0: "Troposphere",
-        14.9999: "Troposphere",
-        15.0: "Stratosphere",
-        50.0: "Mesosphere",
-        84.9999: "Mesosphere",
-        85.0: "Thermosphere",
-        400.0: "Thermosphere",
-        600.0: "Exosphere",
-        9999.0: "Exosphere",
-        -1.0: "None",
-        20000.0: "None",
-    }
-    fails = [(km, exp, layer_at(km)) for km, exp in cases.items() if layer_at(km) != exp]
-    if fails:
-        raise AssertionError(f"Self-checks failed: {fails}")
+        idx = _classify_idx(km)
+        return _NAMES[idx] if idx >= 0 else "None"
+
+    assert not (fails := [(km, exp, got) for km, exp in _CHECK_CASES if (got := layer_at(km)) != exp]), \
+        f"Self-checks failed: {fails}"
 
 
 # ---------- FastAPI (optional) ----------
 
 def create_app():
     try:
-        from fastapi import FastAPI, HTTPException
+        from fastapi import FastAPI, HTTPException, Request
+        from fastapi.concurrency import run_in_threadpool
+        from fastapi.responses import JSONResponse
         from pydantic import BaseModel
     except Exception as e:
         raise RuntimeError("FastAPI is not installed. Run `pip install fastapi uvicorn`.") from e
 
-    app = FastAPI(title="Atmospheric Layer Classifier", version="1.0.0")
+    class _ORJSONResponse(JSONResponse):
+        def render(self, content: Any) -> bytes:
+            # default=dict covers the read-only MappingProxyType reports from _describe_cached
+            return orjson.dumps(content, default=dict)
+
+    app = FastAPI(
+        title="Atmospheric Layer Classifier",
+        version="1.0.0",
+        default_response_class=_ORJSONResponse if orjson is not None else JSONResponse,
+    )
 
     class Query(BaseModel):
         altitude: float
@@ -236,16 +622,32 @@ def create_app():
     @app.get("/layer")
     def get_layer(altitude: float, unit: str = "km"):
         try:
-            return describe_altitude(altitude, unit=unit)
+            return _describe_cached(altitude, unit)
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
-    @app.post("/batch")
     def post_batch(items: List[Query]):
-        out = []
-        for q in items:
-            out.append(describe_altitude(q.altitude, unit=q.unit))
-        return out
+        out: List[Any] = [None] * len(items)
+        for i, q in enumerate(items):
+            out[i] = _describe_cached(q.altitude, q.unit)
+        # Serialize in one orjson call instead of FastAPI's per-item jsonable_encoder pass
+        return _ORJSONResponse(out) if orjson is not None else out
+
+    async def post_batch_csv(request: Request):
+        # Raw CSV body (same columns as --batch), parsed column-wise instead of per-item models
+        body = await request.body()
+        try:
+            reports = await run_in_threadpool(lambda: describe_altitudes(*read_batch_csv_bytes(body)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return _ORJSONResponse(reports) if orjson is not None else reports
+
+    # With postponed annotations FastAPI cannot resolve function-local names such as
+    # the Query model from annotation strings, so hand it the evaluated types first.
+    post_batch.__annotations__["items"] = List[Query]
+    app.post("/batch")(post_batch)
+    post_batch_csv.__annotations__["request"] = Request
+    app.post("/batch_csv")(post_batch_csv)
 
     return app
 
@@ -260,6 +662,16 @@ def _serve(host: str = "0.0.0.0", port: int = 8000) -> None:
 # ---------- CLI ----------
 
 def main() -> None:
+    # Fast path for the common `atmo_layers.py <km>` call: skip argparse and self-checks
+    if len(sys.argv) == 2 and sys.argv[1][:1] not in ("", "-"):
+        try:
+            altitude = float(sys.argv[1])
+        except ValueError:
+            pass  # let argparse report it
+        else:
+            _print_human(describe_altitude(altitude))
+            return
+
     p = argparse.ArgumentParser(description="Classify altitude into an atmospheric layer and describe it.")
     g = p.add_mutually_exclusive_group(required=False)
     g.add_argument("altitude", nargs="?", type=float, help="Altitude value (km by default unless --miles)")
@@ -268,6 +680,8 @@ def main() -> None:
     p.add_argument("--miles", action="store_true", help="Interpret single altitude as miles (default: km)")
     p.add_argument("--json", action="store_true", help="Output JSON for single altitude")
     p.add_argument("--out", metavar="FILE", help="Write batch results to .csv / .json / .jsonl")
+    p.add_argument("--dedupe", action="store_true",
+                   help="Batch: classify each distinct altitude/unit pair once and reuse its report")
     p.add_argument("--no-checks", action="store_true", help="Skip self-checks")
     p.add_argument("--serve", action="store_true", help="Run FastAPI server (requires fastapi & uvicorn)")
 
@@ -277,13 +691,12 @@ def main() -> None:
         _serve()
         return
 
-    if not args.no_checks:
+    if __debug__ and not args.no_checks:
         _self_checks()
 
     if args.batch:
         try:
-            rows = list(read_batch_csv(args.batch))
-            reports = [describe_altitude(a, unit=u) for a, u in rows]
+            reports = _iter_batch_reports(args.batch, dedupe=args.dedupe)
             if args.out:
                 write_results(args.out, reports)
             else:
@@ -1,4 +1,6 @@
-from src.atmo_layers import classify_layer, describe_altitude
+import pytest
+
+from src.atmo_layers import classify_layer, describe_altitude, describe_altitudes
 
 
 def name_at(km: float):
@@ -29,3 +31,223 @@ def test_describe_has_expected_keys():
     r = describe_altitude(100, unit="km")
     for k in ["layer", "extent", "temperature_profile", "composition", "phenomena"]:
         assert k in r
+
+def test_nan_is_out_of_range():
+    assert name_at(float("nan")) is None
+
+def test_describe_altitudes_matches_scalar(monkeypatch):
+    from src import atmo_layers
+
+    # Batch through NumPy (or the scalar loop), not the C extension the scalar side may use
+    monkeypatch.setattr(atmo_layers, "_CORE", None)
+    alts = [0.0, 15.0, 62.1371, 600.0, -1.0, 20000.0, float("nan")]
+    units = ["km", "km", "mi", "km", "km", "mi", "km"]
+    batch = describe_altitudes(alts, units)
+    for a, u, r in zip(alts, units, batch):
+        expected = describe_altitude(a, unit=u)
+        assert r["layer"] == expected["layer"]
+        assert r.get("note") == expected.get("note")
+
+def test_compare_chain_matches_bisect():
+    from src.atmo_layers import _classify_idx_bisect, _classify_idx_chain
+
+    for km in [-1.0, 0.0, 14.9999, 15.0, 49.9999, 50.0, 85.0, 400.0, 600.0, 9999.9, 10000.0, float("nan")]:
+        assert _classify_idx_chain(km) == _classify_idx_bisect(km)
+
+def test_read_batch_csv_skips_blank_rows_and_defaults_unit(tmp_path):
+    from src.atmo_layers import read_batch_csv
+
+    p = tmp_path / "alts.csv"
+    p.write_text("altitude,unit\n1,km\n\n2\n3,MI\n", encoding="utf-8")
+    assert list(read_batch_csv(str(p))) == [(1.0, "km"), (2.0, "km"), (3.0, "mi")]
+
+def test_read_batch_csv_bulk_matches_row_reader(tmp_path):
+    pytest.importorskip("pandas")
+    from src.atmo_layers import read_batch_csv, read_batch_csv_bulk
+
+    def bulk_rows(path, chunk_rows):
+        return [(a, u) for alts, units in read_batch_csv_bulk(path, chunk_rows) for a, u in zip(alts.tolist(), units.tolist())]
+
+    p = tmp_path / "alts.csv"
+    p.write_text("altitude,unit\n1,km\n\n2,\n3, MI\n4\n0.1234567890123456789,km\nnan,km\n-0.0,mi\n", encoding="utf-8")
+    # chunk_rows=3 puts "nan" in a chunk of its own that falls back to float()
+    for chunk_rows in (3, 1000):
+        assert repr(bulk_rows(str(p), chunk_rows)) == repr(list(read_batch_csv(str(p))))
+
+    for body, error in [("1\n2\n,km\n", "Row 4: empty altitude"), ("1\n2\nabc\n", "Row 4: altitude must be a number"),
+                        ("1\n2\n3,  \n", "Row 4: unit must be")]:
+        p.write_text("altitude,unit\n" + body, encoding="utf-8")
+        for reader in (lambda path: bulk_rows(path, 2), lambda path: list(read_batch_csv(path))):
+            with pytest.raises(ValueError, match=error):
+                reader(str(p))
+
+def test_write_results_json_streams_same_layout_as_whole_list_dump(tmp_path):
+    from src.atmo_layers import _json_bytes, write_results
+
+    for reports in ([], [describe_altitude(100), describe_altitude(-5)]):
+        out = tmp_path / "out.json"
+        write_results(str(out), (r for r in reports))
+        assert out.read_bytes() == _json_bytes(reports, indent=True)
+
+def test_json_bytes_writes_nonfinite_as_null_with_either_backend(monkeypatch):
+    from src import atmo_layers
+
+    reports = [describe_altitude(float("nan")), describe_altitude(float("inf"), "mi")]
+    expected = atmo_layers._json_bytes(reports, indent=True)
+    assert b"NaN" not in expected and b"Infinity" not in expected
+    monkeypatch.setattr(atmo_layers, "orjson", None)
+    assert atmo_layers._json_bytes(reports, indent=True) == expected
+
+def test_write_results_leaves_existing_output_on_bad_row(tmp_path):
+    from src.atmo_layers import _iter_batch_reports, write_results
+
+    src = tmp_path / "alts.csv"
+    src.write_text("altitude\n1\nabc\n", encoding="utf-8")
+    for name in ("out.json", "out.jsonl", "out.csv"):
+        out = tmp_path / name
+        out.write_text("previous", encoding="utf-8")
+        with pytest.raises(ValueError, match="Row 3"):
+            write_results(str(out), _iter_batch_reports(str(src)))
+        assert out.read_text(encoding="utf-8") == "previous"
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["alts.csv", "out.csv", "out.json", "out.jsonl"]
+
+def test_describe_cached_is_read_only_and_shared():
+    from src.atmo_layers import _describe_cached
+
+    r = _describe_cached(400.0, "km")
+    assert r["layer"] == "Thermosphere"
+    assert _describe_cached(400.0, "km") is r
+    with pytest.raises(TypeError):
+        r["layer"] = "x"  # type: ignore[index]
+    with pytest.raises(TypeError):
+        r["input"]["unit"] = "mi"  # type: ignore[index]
+    for a, b in [(0.0, -0.0), (1.0, 1)]:
+        assert repr(_describe_cached(b, "km")["input"]["altitude"]) == repr(b)
+        assert repr(_describe_cached(a, "km")["input"]["altitude"]) == repr(a)
+
+def test_api_batch_accepts_query_list():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from src.atmo_layers import create_app
+
+    client = TestClient(create_app())
+    resp = client.post("/batch", json=[{"altitude": 1}, {"altitude": 400, "unit": "km"}])
+    assert resp.status_code == 200
+    assert [r["layer"] for r in resp.json()] == ["Troposphere", "Thermosphere"]
+
+def test_open_ended_layer_uses_inf_upper_bound():
+    import math
+
+    from src.atmo_layers import Layer
+
+    L = Layer("Open", 0.0, None, "", "", "", "")  # type: ignore[arg-type]
+    assert L.max_km == math.inf
+    assert L.contains(1e12)
+    assert not L.contains(-1.0)
+
+def test_parallel_batch_kernel_matches_searchsorted(monkeypatch):
+    np = pytest.importorskip("numpy")
+    pytest.importorskip("numba")
+    from src import atmo_layers
+
+    monkeypatch.setattr(atmo_layers, "_CORE", None)
+    alts_km = np.array([-1.0, 0.0, 14.9999, 15.0, 84.9999, 85.0, 600.0, 9999.0, 10000.0, np.nan])
+    expected = atmo_layers._classify_km_array(alts_km)
+    monkeypatch.setattr(atmo_layers, "_PARALLEL_MIN_ROWS", 0)
+    assert atmo_layers._classify_km_array(alts_km).tolist() == expected.tolist()
+
+def test_parallel_batch_kernel_needs_numba_already_imported(monkeypatch):
+    import sys
+
+    np = pytest.importorskip("numpy")
+    from src import atmo_layers
+
+    def fail():
+        raise AssertionError("numba kernel compiled without numba loaded")
+
+    monkeypatch.delitem(sys.modules, "numba", raising=False)
+    monkeypatch.setattr(atmo_layers, "_CORE", None)
+    monkeypatch.setattr(atmo_layers, "_PARALLEL_MIN_ROWS", 0)
+    monkeypatch.setattr(atmo_layers, "_compile_classify_all", fail)
+    assert atmo_layers._classify_km_array(np.array([1.0, 20.0, np.nan])).tolist() == [0, 1, -1]
+
+def test_batch_dedupe_reuses_reports_for_repeated_altitudes(tmp_path):
+    from src.atmo_layers import _iter_batch_reports
+
+    p = tmp_path / "alts.csv"
+    p.write_text("altitude,unit\n100,km\n20,mi\n100.0,km\n100,mi\n14.9999999,km\n15.0,km\n0,km\n-0.0,km\n",
+                 encoding="utf-8")
+    plain = list(_iter_batch_reports(str(p)))
+    deduped = list(_iter_batch_reports(str(p), dedupe=True))
+    assert repr(deduped) == repr(plain)  # repr also tells -0.0 from 0.0
+    assert deduped[0] is deduped[2]
+    assert deduped[0] is not deduped[3]
+    assert [r["layer"] for r in deduped[4:6]] == ["Troposphere", "Stratosphere"]
+
+def test_classify_layer_idx_indexes_layers():
+    from src.atmo_layers import LAYERS, classify_layer_idx
+
+    for km in [0.0, 15.0, 49.9999, 85.0, 600.0, 9999.0]:
+        assert LAYERS[classify_layer_idx(km)] is classify_layer(km)
+    assert classify_layer_idx(-1.0) == -1
+    assert classify_layer_idx(20000.0) == -1
+
+def test_c_core_matches_bisect():
+    core = pytest.importorskip("src._atmo_core")
+    import random
+    from array import array
+
+    from src.atmo_layers import _UPPER_BOUNDS, _classify_idx_bisect
+
+    assert tuple(core.BOUNDS) == _UPPER_BOUNDS
+    rng = random.Random(0)
+    kms = [-1.0, -0.0, 0.0, 14.9999, 15.0, 49.9999, 50.0, 85.0, 600.0, 9999.0, 10000.0,
+           float("nan"), float("inf"), float("-inf")]
+    kms += [rng.uniform(-100.0, 12000.0) for _ in range(100_000)]
+    kms += [rng.choice(_UPPER_BOUNDS) + rng.choice((-1e-9, 0.0, 1e-9)) for _ in range(10_000)]
+    out = array("b", bytes(len(kms)))
+    core.classify_many(array("d", kms), out)
+    expected = [_classify_idx_bisect(km) for km in kms]
+    assert out.tolist() == expected
+    assert [core.classify_idx(km) for km in kms] == expected
+
+def test_api_batch_csv_accepts_raw_csv_body():
+    pytest.importorskip("fastapi")
+    pytest.importorskip("httpx")
+    from fastapi.testclient import TestClient
+
+    from src.atmo_layers import create_app
+
+    client = TestClient(create_app())
+    resp = client.post("/batch_csv", content=b"altitude,unit\n1,km\n400,KM\n20000,mi\n")
+    assert resp.status_code == 200
+    assert [r["layer"] for r in resp.json()] == ["Troposphere", "Thermosphere", None]
+
+    resp = client.post("/batch_csv", content=b"altitude,unit\nnan,km\n-1,\n")
+    assert resp.status_code == 200
+    assert [r["layer"] for r in resp.json()] == [None, None]
+
+    resp = client.post("/batch_csv", content=b"altitude,unit\n1,km\n,km\n")
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Row 3: empty altitude"
+
+def test_read_batch_csv_bytes_matches_row_reader(tmp_path):
+    from src.atmo_layers import read_batch_csv, read_batch_csv_bytes
+
+    p = tmp_path / "alts.csv"
+    for data in [
+        b"altitude,unit\n1,km\n\n2,\n3, MI\n0.1234567890123456789,km\nnan,km\n-0.0,mi\n",
+        b"altitude,unit\n1,km\n2\n3,mi,extra\n",  # short row and extra field
+        b"altitude,unit,altitude\n1,mi,2\n",  # duplicate header: the first column wins
+        b"altitude\n1_000\n",
+    ]:
+        p.write_bytes(data)
+        alts, units = read_batch_csv_bytes(data)
+        alts = alts.tolist() if hasattr(alts, "tolist") else alts
+        units = units.tolist() if hasattr(units, "tolist") else units
+        assert repr(list(zip(alts, units))) == repr(list(read_batch_csv(str(p))))
+
+    with pytest.raises(ValueError, match="Row 3: unit must be"):
+        read_batch_csv_bytes(b"altitude,unit\n1,km\n2,  \n")